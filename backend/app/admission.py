@@ -0,0 +1,244 @@
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Depends
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from app.auth_supabase import get_current_user_id
+
+
+@dataclass
+class EndpointClassLimits:
+    """Admission limits for one class of endpoints"""
+    rate_per_minute: float
+    burst: int
+    max_concurrency: Optional[int] = None
+    max_queue: int = 0
+    queue_timeout: float = 0.0
+
+    def __post_init__(self):
+        if self.max_concurrency is not None and self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+
+def _limits_from_env(name: str, rate_per_minute: float, burst: int,
+                     max_concurrency: Optional[int] = None, max_queue: int = 0,
+                     queue_timeout: float = 0.0) -> EndpointClassLimits:
+    """Read limits for an endpoint class, e.g. RATE_LIMIT_CHAT_PER_MINUTE"""
+    prefix = name.upper()
+    concurrency = os.getenv(f"{prefix}_MAX_CONCURRENCY")
+    return EndpointClassLimits(
+        rate_per_minute=float(os.getenv(f"RATE_LIMIT_{prefix}_PER_MINUTE", rate_per_minute)),
+        burst=int(os.getenv(f"RATE_LIMIT_{prefix}_BURST", burst)),
+        max_concurrency=int(concurrency) if concurrency else max_concurrency,
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_SECONDS", queue_timeout)),
+    )
+
+
+def load_limits() -> Dict[str, EndpointClassLimits]:
+    """Build limits for every endpoint class from the environment"""
+    return {
+        "default": _limits_from_env("default", rate_per_minute=120, burst=30),
+        "chat": _limits_from_env("chat", rate_per_minute=10, burst=3, max_concurrency=4, max_queue=8, queue_timeout=10),
+        "upload": _limits_from_env("upload", rate_per_minute=6, burst=3, max_concurrency=2, max_queue=4, queue_timeout=15),
+    }
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute up to burst tokens"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_consume(self) -> float:
+        """Take one token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Give back a token taken by a request that was not admitted"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AdmissionController:
+    """Per-user rate limiting and bounded concurrency pools per endpoint class"""
+
+    def __init__(self, limits: Dict[str, EndpointClassLimits] = None, max_tracked_buckets: int = None):
+        self.limits = limits or load_limits()
+        # Upper bound on tracked (user, endpoint class) buckets; least recently used are evicted
+        self.max_tracked_buckets = max_tracked_buckets or int(os.getenv("ADMISSION_MAX_TRACKED_BUCKETS", "10000"))
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._pools: Dict[str, asyncio.Semaphore] = {}
+        self._waiting: Dict[str, int] = {name: 0 for name in self.limits}
+        self._in_flight: Dict[str, int] = {name: 0 for name in self.limits}
+        self.counters: Dict[str, Dict[str, int]] = {
+            name: {"admitted": 0, "queued": 0, "rejected_rate_limited": 0, "rejected_overloaded": 0}
+            for name in self.limits
+        }
+
+    def _get_bucket(self, user_id: str, endpoint_class: str) -> TokenBucket:
+        key = (user_id, endpoint_class)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            limits = self.limits[endpoint_class]
+            bucket = TokenBucket(limits.rate_per_minute, limits.burst)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_tracked_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _get_pool(self, endpoint_class: str) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running event loop
+        pool = self._pools.get(endpoint_class)
+        if pool is None:
+            pool = asyncio.Semaphore(self.limits[endpoint_class].max_concurrency)
+            self._pools[endpoint_class] = pool
+        return pool
+
+    async def acquire(self, user_id: str, endpoint_class: str) -> bool:
+        """Admit a request or raise 429/503; returns True if a pool slot is held"""
+        limits = self.limits[endpoint_class]
+        counters = self.counters[endpoint_class]
+
+        bucket = self._get_bucket(user_id, endpoint_class)
+        retry_after = bucket.try_consume()
+        if retry_after > 0:
+            counters["rejected_rate_limited"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+        if limits.max_concurrency is None:
+            counters["admitted"] += 1
+            return False
+
+        pool = self._get_pool(endpoint_class)
+        if pool.locked():
+            if self._waiting[endpoint_class] >= limits.max_queue:
+                counters["rejected_overloaded"] += 1
+                bucket.refund()
+                raise self._overloaded(limits)
+
+            counters["queued"] += 1
+            self._waiting[endpoint_class] += 1
+            try:
+                await asyncio.wait_for(pool.acquire(), timeout=limits.queue_timeout or None)
+            except asyncio.TimeoutError:
+                counters["rejected_overloaded"] += 1
+                bucket.refund()
+                raise self._overloaded(limits)
+            finally:
+                self._waiting[endpoint_class] -= 1
+        else:
+            await pool.acquire()
+
+        counters["admitted"] += 1
+        self._in_flight[endpoint_class] += 1
+        return True
+
+    def release(self, endpoint_class: str):
+        """Return a pool slot taken by acquire()"""
+        self._in_flight[endpoint_class] -= 1
+        self._get_pool(endpoint_class).release()
+
+    def _overloaded(self, limits: EndpointClassLimits) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(limits.queue_timeout)))}
+        )
+
+    def stats(self) -> dict:
+        """Admission counters plus current queue depth and in-flight requests per class"""
+        stats = {}
+        for name in self.limits:
+            stats[name] = {
+                **self.counters[name],
+                "waiting": self._waiting[name],
+                "in_flight": self._in_flight[name],
+            }
+        return stats
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the admission controller singleton"""
+    global _admission_controller
+
+    # Created on first use so limits are read after .env has been loaded
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+
+    return _admission_controller
+
+
+def admit(endpoint_class: str = "default"):
+    """FastAPI dependency that admits the current user's request for an endpoint class"""
+    async def dependency(user_id: str = Depends(get_current_user_id)):
+        controller = get_admission_controller()
+        holds_slot = await controller.acquire(user_id, endpoint_class)
+        try:
+            yield
+        finally:
+            if holds_slot:
+                controller.release(endpoint_class)
+
+    return dependency
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests to selected routes before their body is read
+
+    FastAPI reads the whole request body before solving route dependencies, so
+    routes taking large uploads are admitted here to shed load without first
+    receiving the file.
+    """
+
+    def __init__(self, app, routes: Dict[Tuple[str, str], str]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        endpoint_class = None
+        if scope["type"] == "http":
+            endpoint_class = self.routes.get((scope["method"], scope["path"]))
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = get_admission_controller()
+        try:
+            user_id = await get_current_user_id(Headers(scope=scope).get("authorization"))
+            holds_slot = await controller.acquire(user_id, endpoint_class)
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if holds_slot:
+                controller.release(endpoint_class)
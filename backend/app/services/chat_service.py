@@ -9,6 +9,7 @@ from langchain_community.vectorstores import SupabaseVectorStore
 from langchain.chains import RetrievalQA
 from app.database import get_supabase_client
 from app.models import ChatResponse
+from app.text_compression import COMPRESSED_TEXT_COLUMN, decode_document_text, get_document_text_cache
 
 class ChatService:
     def __init__(self):
@@ -61,10 +62,26 @@ class ChatService:
             raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
     async def _get_user_documents(self, user_id: str) -> List[dict]:
-        """Get user's documents from database"""
+        """Get user's documents from database, fetching text only for documents not already cached"""
         try:
-            response = await self.supabase.table("documents").select("extracted_text, file_name").eq("user_id", user_id).execute()
-            return response.data if response.data else []
+            response = await self.supabase.table("documents").select("id, file_name").eq("user_id", user_id).execute()
+            documents = response.data if response.data else []
+
+            missing_ids = []
+            for doc in documents:
+                text = get_document_text_cache().get(doc["id"])
+                if text is None:
+                    missing_ids.append(doc["id"])
+                doc["extracted_text"] = text
+
+            if missing_ids:
+                text_response = await self.supabase.table("documents").select(f"id, extracted_text, {COMPRESSED_TEXT_COLUMN}").eq("user_id", user_id).in_("id", missing_ids).execute()
+                texts = {row["id"]: decode_document_text(row).get("extracted_text") for row in (text_response.data or [])}
+                for doc in documents:
+                    if doc["id"] in texts:
+                        doc["extracted_text"] = texts[doc["id"]]
+
+            return documents
         except Exception as e:
             print(f"Error fetching user documents: {e}")
             return []
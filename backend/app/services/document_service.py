@@ -6,6 +6,7 @@ from datetime import datetime
 from fastapi import HTTPException, UploadFile
 from app.database import get_supabase_client
 from app.models import DocumentResponse
+from app.text_compression import COMPRESSED_TEXT_COLUMN, compress_text, decode_document_text, get_document_text_cache
 
 class DocumentService:
     def __init__(self):
@@ -17,7 +18,7 @@ class DocumentService:
             response = await self.supabase.table("documents").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
             
             if response.data:
-                return [DocumentResponse(**doc) for doc in response.data]
+                return [DocumentResponse(**decode_document_text(doc)) for doc in response.data]
             return []
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching documents: {str(e)}")
@@ -59,14 +60,15 @@ class DocumentService:
                 "file_url": file_url,
                 "file_size": file_size,
                 "file_type": file.content_type or "application/octet-stream",
-                "extracted_text": extracted_text,
+                "extracted_text": None,
+                COMPRESSED_TEXT_COLUMN: compress_text(extracted_text),
                 "created_at": datetime.utcnow().isoformat()
             }
             
             db_response = await self.supabase.table("documents").insert(document_data).execute()
             
             if db_response.data:
-                return DocumentResponse(**db_response.data[0])
+                return DocumentResponse(**decode_document_text(db_response.data[0]))
             else:
                 raise HTTPException(status_code=500, detail="Failed to save document metadata")
                 
@@ -98,6 +100,7 @@ class DocumentService:
             
             # Delete from database
             await self.supabase.table("documents").delete().eq("id", document_id).eq("user_id", user_id).execute()
+            get_document_text_cache().evict(document_id)
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
@@ -1,9 +1,74 @@
-from typing import List
+import io
+import csv
+import json
+import zlib
+from typing import List, AsyncIterator
 from datetime import datetime
 from fastapi import HTTPException
 from app.database import get_supabase_client
 from app.models import VitalsCreate, VitalsResponse
 
+EXPORT_COLUMNS = [
+    "id",
+    "user_id",
+    "heart_rate",
+    "temperature",
+    "spo2",
+    "blood_pressure_systolic",
+    "blood_pressure_diastolic",
+    "notes",
+    "created_at",
+]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_PAGE_SIZE = 1000
+
+
+class _ParquetChunkSink:
+    """Write-only file object that hands back Parquet bytes as they are written.
+
+    ParquetWriter records absolute offsets in the file footer, so tell() has to
+    keep counting after the buffered bytes have been drained.
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._buffer.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate(0)
+        return data
+
+
 class VitalsService:
     def __init__(self):
         self.supabase = get_supabase_client()
@@ -82,3 +147,106 @@ class VitalsService:
             }
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching vitals summary: {str(e)}")
+
+    async def _fetch_vitals_page(self, user_id: str, after_id: int, page_size: int = EXPORT_PAGE_SIZE) -> List[dict]:
+        """Fetch one page of a user's vitals with id greater than after_id"""
+        response = await self.supabase.table("vitals").select(",".join(EXPORT_COLUMNS)).eq("user_id", user_id).gt("id", after_id).order("id").limit(page_size).execute()
+        return response.data or []
+
+    async def _iter_vitals_pages(self, user_id: str, first_page: List[dict]) -> AsyncIterator[List[dict]]:
+        """Page through a user's vitals by keyset on id until a page comes back empty"""
+        rows = first_page
+        while rows:
+            yield rows
+            try:
+                rows = await self._fetch_vitals_page(user_id, rows[-1]["id"])
+            except Exception as e:
+                # The response has already started; re-raise so the server aborts
+                # the connection instead of ending the body as if it were complete
+                print(f"Error fetching vitals during export: {e}")
+                raise
+
+    async def export_user_vitals(self, user_id: str, export_format: str = "csv", compress: bool = False) -> AsyncIterator[bytes]:
+        """Return a byte stream of a user's full vitals history as CSV, NDJSON or Parquet
+
+        The first page is fetched before returning so that query errors surface
+        as a proper error status rather than a truncated 200 response.
+        """
+        encoders = {
+            "csv": self._encode_csv,
+            "ndjson": self._encode_ndjson,
+            "parquet": self._encode_parquet,
+        }
+        if export_format not in encoders:
+            raise HTTPException(status_code=400, detail=f"Unsupported export format: {export_format}")
+
+        try:
+            first_page = await self._fetch_vitals_page(user_id, 0)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching vitals: {str(e)}")
+
+        chunks = encoders[export_format](self._iter_vitals_pages(user_id, first_page))
+        if compress:
+            chunks = self._gzip_stream(chunks)
+        return chunks
+
+    async def _gzip_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Gzip-compress a byte stream incrementally"""
+        # wbits=MAX_WBITS|16 produces a gzip container rather than raw zlib
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    async def _encode_csv(self, pages: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+        """Encode vitals pages as CSV, header first"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        yield buffer.getvalue().encode("utf-8")
+
+        async for rows in pages:
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+
+    async def _encode_ndjson(self, pages: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+        """Encode vitals pages as newline-delimited JSON"""
+        async for rows in pages:
+            lines = [json.dumps({column: row.get(column) for column in EXPORT_COLUMNS}, default=str) for row in rows]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def _encode_parquet(self, pages: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+        """Encode vitals pages as a Parquet file, one row group per page"""
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.string()),
+            ("heart_rate", pa.int64()),
+            ("temperature", pa.float64()),
+            ("spo2", pa.int64()),
+            ("blood_pressure_systolic", pa.int64()),
+            ("blood_pressure_diastolic", pa.int64()),
+            ("notes", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ])
+
+        sink = _ParquetChunkSink()
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+        try:
+            async for rows in pages:
+                df = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+                df["created_at"] = pd.to_datetime(df["created_at"], utc=True, format="ISO8601")
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+        yield sink.drain()
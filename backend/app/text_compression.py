@@ -0,0 +1,91 @@
+import os
+import gzip
+import base64
+from collections import OrderedDict
+from typing import Optional
+
+# Column holding base64-encoded gzip of the document text; extracted_text is
+# only populated on rows written before compression was introduced
+COMPRESSED_TEXT_COLUMN = "extracted_text_gz"
+
+
+def compress_text(text: Optional[str]) -> Optional[str]:
+    """Gzip text and base64-encode it so it can be stored in a TEXT column"""
+    if text is None:
+        return None
+    return base64.b64encode(gzip.compress(text.encode("utf-8"), compresslevel=9)).decode("ascii")
+
+
+def decompress_text(data: Optional[str]) -> Optional[str]:
+    """Reverse compress_text"""
+    if data is None:
+        return None
+    return gzip.decompress(base64.b64decode(data)).decode("utf-8")
+
+
+class DocumentTextCache:
+    """LRU cache of decompressed document text, bounded by total characters"""
+
+    def __init__(self, max_chars: int = None):
+        # Upper bound on decompressed characters kept in memory across all documents
+        self.max_chars = max_chars or int(os.getenv("DOCUMENT_TEXT_CACHE_MAX_CHARS", str(16 * 1024 * 1024)))
+        self._entries: "OrderedDict[int, str]" = OrderedDict()
+        self._size = 0
+
+    def get(self, document_id: int) -> Optional[str]:
+        text = self._entries.get(document_id)
+        if text is not None:
+            self._entries.move_to_end(document_id)
+        return text
+
+    def put(self, document_id: int, text: str):
+        if len(text) > self.max_chars:
+            return
+        self.evict(document_id)
+        self._entries[document_id] = text
+        self._size += len(text)
+        while self._size > self.max_chars:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def evict(self, document_id: int):
+        text = self._entries.pop(document_id, None)
+        if text is not None:
+            self._size -= len(text)
+
+
+_document_text_cache: Optional[DocumentTextCache] = None
+
+
+def get_document_text_cache() -> DocumentTextCache:
+    """Get or create the document text cache singleton"""
+    global _document_text_cache
+
+    # Created on first use so the size limit is read after .env has been loaded
+    if _document_text_cache is None:
+        _document_text_cache = DocumentTextCache()
+
+    return _document_text_cache
+
+
+def decode_document_text(doc: dict) -> dict:
+    """Replace a row's compressed text column with plain extracted_text, in place
+
+    Legacy rows that still carry plain extracted_text are cached the same way.
+    """
+    compressed = doc.pop(COMPRESSED_TEXT_COLUMN, None)
+    document_id = doc.get("id")
+    cache = get_document_text_cache()
+
+    if compressed is None:
+        if document_id is not None and doc.get("extracted_text") is not None:
+            cache.put(document_id, doc["extracted_text"])
+        return doc
+
+    text = cache.get(document_id) if document_id is not None else None
+    if text is None:
+        text = decompress_text(compressed)
+        if document_id is not None:
+            cache.put(document_id, text)
+    doc["extracted_text"] = text
+    return doc
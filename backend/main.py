@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Literal
 import os
 from dotenv import load_dotenv
 import json
@@ -9,8 +10,9 @@ from datetime import datetime, timedelta
 
 from app.database import get_supabase_client
 from app.auth_supabase import get_current_user_id
+from app.admission import admit, get_admission_controller, AdmissionMiddleware
 from app.models import VitalsCreate, VitalsResponse, DocumentResponse, ChatRequest, ChatResponse
-from app.services.vitals_service import VitalsService
+from app.services.vitals_service import VitalsService, EXPORT_MEDIA_TYPES
 from app.services.document_service import DocumentService
 from app.services.chat_service import ChatService
 
@@ -22,6 +24,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admission for upload routes runs before the body is read; added before CORS
+# so rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware, routes={("POST", "/documents/upload"): "upload"})
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -44,24 +50,44 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {"status": "healthy", "timestamp": datetime.utcnow(), "admission": get_admission_controller().stats()}
 
 # Note: Authentication is now handled by Supabase Auth directly
 # The frontend uses Supabase Auth, and the backend verifies tokens with Supabase
 
 # Vitals endpoints
-@app.get("/vitals", response_model=List[VitalsResponse])
+@app.get("/vitals", response_model=List[VitalsResponse], dependencies=[Depends(admit())])
 async def get_vitals(user_id: str = Depends(get_current_user_id)):
     return await vitals_service.get_user_vitals(user_id)
 
-@app.post("/vitals", response_model=VitalsResponse)
+@app.get("/vitals/export", dependencies=[Depends(admit())])
+async def export_vitals(
+    export_format: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format"),
+    compress: bool = False,
+    user_id: str = Depends(get_current_user_id)
+):
+    file_name = f"vitals.{export_format}"
+    media_type = EXPORT_MEDIA_TYPES[export_format]
+    if compress:
+        file_name += ".gz"
+        media_type = "application/gzip"
+
+    # Awaited before the response starts so the first query can still fail with 500
+    chunks = await vitals_service.export_user_vitals(user_id, export_format, compress)
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+@app.post("/vitals", response_model=VitalsResponse, dependencies=[Depends(admit())])
 async def create_vitals(
     vitals: VitalsCreate,
     user_id: str = Depends(get_current_user_id)
 ):
     return await vitals_service.create_vitals(user_id, vitals)
 
-@app.delete("/vitals/{vital_id}")
+@app.delete("/vitals/{vital_id}", dependencies=[Depends(admit())])
 async def delete_vitals(
     vital_id: int,
     user_id: str = Depends(get_current_user_id)
@@ -70,7 +96,7 @@ async def delete_vitals(
     return {"message": "Vital deleted successfully"}
 
 # Document endpoints
-@app.get("/documents", response_model=List[DocumentResponse])
+@app.get("/documents", response_model=List[DocumentResponse], dependencies=[Depends(admit())])
 async def get_documents(user_id: str = Depends(get_current_user_id)):
     return await document_service.get_user_documents(user_id)
 
@@ -84,7 +110,7 @@ async def upload_document(
     
     return await document_service.upload_and_process_document(user_id, file)
 
-@app.delete("/documents/{document_id}")
+@app.delete("/documents/{document_id}", dependencies=[Depends(admit())])
 async def delete_document(
     document_id: int,
     user_id: str = Depends(get_current_user_id)
@@ -93,7 +119,7 @@ async def delete_document(
     return {"message": "Document deleted successfully"}
 
 # Chat endpoint
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat", response_model=ChatResponse, dependencies=[Depends(admit("chat"))])
 async def chat(
     chat_request: ChatRequest,
     user_id: str = Depends(get_current_user_id)
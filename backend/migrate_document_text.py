@@ -0,0 +1,44 @@
+"""Compress extracted_text of existing documents into extracted_text_gz.
+
+Run once after adding the extracted_text_gz column (see setup_database.sql):
+
+    python migrate_document_text.py
+
+Rows are processed in pages by id, so the script can be interrupted and
+re-run safely; already-migrated rows have extracted_text set to NULL.
+"""
+from dotenv import load_dotenv
+
+from app.database import get_supabase_admin_client
+from app.text_compression import COMPRESSED_TEXT_COLUMN, compress_text
+
+PAGE_SIZE = 100
+
+
+def migrate():
+    supabase = get_supabase_admin_client()
+    last_id = 0
+    migrated = 0
+
+    while True:
+        response = supabase.table("documents").select("id, extracted_text").not_.is_("extracted_text", "null").gt("id", last_id).order("id").limit(PAGE_SIZE).execute()
+        rows = response.data or []
+        if not rows:
+            break
+
+        for row in rows:
+            supabase.table("documents").update({
+                COMPRESSED_TEXT_COLUMN: compress_text(row["extracted_text"]),
+                "extracted_text": None,
+            }).eq("id", row["id"]).execute()
+            migrated += 1
+
+        last_id = rows[-1]["id"]
+        print(f"Migrated {migrated} documents")
+
+    print(f"Done, {migrated} documents compressed")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    migrate()
@@ -22,11 +22,15 @@ CREATE TABLE IF NOT EXISTS documents (
     file_url TEXT NOT NULL,
     file_size INTEGER NOT NULL,
     file_type VARCHAR(100) NOT NULL,
-    extracted_text TEXT,
+    extracted_text TEXT, -- Legacy plain text; new rows use extracted_text_gz
+    extracted_text_gz TEXT, -- Base64-encoded gzip of the extracted text
     embedding vector(768), -- For pgvector embeddings
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Add compressed text column to existing installs (run migrate_document_text.py afterwards)
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS extracted_text_gz TEXT;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_vitals_user_id ON vitals(user_id);
 CREATE INDEX IF NOT EXISTS idx_vitals_created_at ON vitals(created_at DESC);